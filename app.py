@@ -10,10 +10,12 @@ import json
 import os
 import io
 import base64
+import binascii
 import time
 import uuid
 import shutil
 import re
+import string
 import tempfile
 import zipfile
 from datetime import datetime, date
@@ -21,8 +23,19 @@ from docx import Document
 from docx.shared import Inches
 from PIL import Image, UnidentifiedImageError
 import hashlib
+import hmac
+import html
+from collections import OrderedDict
 from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
 import traceback
+import threading
+import atexit
+
+try:
+    import pyvips  # optional: shrink-on-load JPEG decode for thumbnails
+except (ImportError, OSError):
+    pyvips = None
 
 # ========================
 # Config
@@ -33,69 +46,156 @@ DB_FILE = "data.db"
 USERS_JSON = "users.json"   # used only for migration
 MEDIA_DIR = "media"
 MIGRATION_MARKER = os.path.join(MEDIA_DIR, ".db_migrated")
+_MEDIA_ROOT_REAL = os.path.realpath(MEDIA_DIR)
+# uploads are re-doable, so photo writes skip the fsync barrier unless MEDIA_FSYNC=1
+MEDIA_FSYNC = os.environ.get("MEDIA_FSYNC") == "1"
+# Streamlit serves <script dir>/static at app/static/ when server.enableStaticServing
+# is on (.streamlit/config.toml); the stylesheet and card thumbnails are published there.
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+STATIC_URL = "app/static"
+STATIC_THUMBS_DIR = os.path.join(STATIC_DIR, "thumbs")
+STATIC_THUMBS_URL = f"{STATIC_URL}/thumbs"
 DEFAULT_PROJECT_NAME = "Default Project"
 
+# Thumbnails
+THUMB_SIZE = (400, 400)
+THUMB_QUALITY = 75
+# data URI cache: total budget, and the largest single URI kept (a 400px JPEG is well under this)
+B64_CACHE_BYTES = 64 * 1024 * 1024
+B64_CACHE_ENTRY_MAX = 512 * 1024
+
 # SQLite pragmas
 PRAGMA_WAL = "WAL"
 PRAGMA_SYNCHRONOUS = "NORMAL"
+PRAGMA_CACHE_SIZE = -65536        # KiB when negative -> 64 MiB page cache
+PRAGMA_MMAP_SIZE = 268435456      # 256 MiB memory-mapped reads
+PRAGMA_BUSY_TIMEOUT_MS = 30000    # wait out another process's write instead of SQLITE_BUSY
+# seconds between PRAGMA optimize runs on the cached connection
+OPTIMIZE_INTERVAL = 15 * 60
+PRAGMA_ANALYSIS_LIMIT = 400       # rows sampled per index when optimize re-analyzes
 
 # ========================
 # Minimal CSS
 # ========================
-st.markdown("""
-<meta name="viewport" content="width=device-width, initial-scale=1">
-<style>
+APP_CSS = """
 .participant-letterbox { max-width: 520px; border-radius: 10px; border: 1px solid rgba(0,0,0,0.06); padding: 8px; margin-bottom: 12px; background: #fff; box-shadow: 0 1px 6px rgba(0,0,0,0.04); }
 .participant-letterbox .photo { width: 100%; height: 220px; display:block; object-fit: cover; border-radius: 8px; background: #f6f6f6; margin-bottom: 8px; }
 .participant-letterbox .name { font-weight: 700; font-size: 1.05rem; margin-bottom: 6px; color: #000 !important; }
 .participant-letterbox .meta { color: rgba(0,0,0,0.6); font-size: 0.95rem; margin-bottom: 4px; }
 .participant-letterbox .small { color: rgba(0,0,0,0.55); font-size: 0.9rem; }
-</style>
-""", unsafe_allow_html=True)
+"""
+
+@st.cache_resource
+def _css_markup():
+    head = '<meta name="viewport" content="width=device-width, initial-scale=1">'
+    if st.get_option("server.enableStaticServing"):
+        # publish once and link it; the browser caches the sheet across reruns
+        try:
+            os.makedirs(STATIC_DIR, exist_ok=True)
+            css_path = os.path.join(STATIC_DIR, "app.css")
+            tmp = f"{css_path}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(APP_CSS)
+            os.replace(tmp, css_path)
+            version = hashlib.blake2b(APP_CSS.encode(), digest_size=6).hexdigest()
+            return f'{head}\n<link rel="stylesheet" href="{STATIC_URL}/app.css?v={version}">'
+        except OSError:
+            pass
+    return f"{head}\n<style>{APP_CSS}</style>"
+
+# Streamlit drops any element that is not re-emitted on a rerun, so the head
+# markup is still written every run; with static serving it is only a <link>.
+st.markdown(_css_markup(), unsafe_allow_html=True)
+
+# ========================
+# Card templates (format parsed once, filled per card)
+# ========================
+PHOTO_TAG_TMPL = "<img class='photo' src='{src}' alt='photo'/>".format
+NO_PHOTO_TAG = "<div class='photo' style='display:flex;align-items:center;justify-content:center;color:#777'>No Photo</div>"
+PARTICIPANT_CARD_TMPL = """
+<div class="participant-letterbox">
+    {img_tag}
+    <div class="name">{name} <span class="small">#{number}</span></div>
+    <div class="meta">Role: {role} • Age: {age}</div>
+    <div class="meta">Agency: {agency}</div>
+    <div class="meta">Height: {height} • Waist: {waist} • Dress/Suit: {dress_suit}</div>
+    <div class="small">Availability: {availability}</div>
+    <div class="small" style="margin-top:6px;"><strong>Sessions:</strong> {sessions}</div>
+</div>
+""".format
 
 # ========================
 # Utilities
 # ========================
 
+_SANITIZE_RE = re.compile(r"[^0-9A-Za-z\-_]+")
+_SAFE_PATH_CHARS = frozenset(string.ascii_letters + string.digits + "-_")
+
 def _sanitize_for_path(s: str) -> str:
     if not isinstance(s, str):
         s = str(s)
     s = s.strip()
-    return re.sub(r"[^0-9A-Za-z\-_]+", "_", s)
+    if _SAFE_PATH_CHARS.issuperset(s):
+        return s
+    return _SANITIZE_RE.sub("_", s)
 
 def hash_password(password: str) -> str:
+    # legacy unsalted format; still accepted by verify_password
     return hashlib.sha256(password.encode()).hexdigest()
 
+def _kdf(password: str, salt: bytes) -> bytes:
+    # OpenSSL-backed, salt travels inside the stored string (no extra column)
+    return hashlib.scrypt(password.encode(), salt=salt, n=2**14, r=8, p=1)
+
+def make_password_hash(password: str) -> str:
+    salt = os.urandom(16)
+    digest = _kdf(password, salt)
+    return f"scrypt${base64.b64encode(salt).decode()}${base64.b64encode(digest).decode()}"
+
+def verify_password(password: str, stored: str) -> bool:
+    if not stored:
+        return False
+    if stored.startswith("scrypt$"):
+        try:
+            _, salt_b64, hash_b64 = stored.split("$")
+            digest = _kdf(password, base64.b64decode(salt_b64))
+            return hmac.compare_digest(digest, base64.b64decode(hash_b64))
+        except Exception:
+            return False
+    return hmac.compare_digest(stored, hash_password(password))
+
 def ensure_media_dir():
     os.makedirs(MEDIA_DIR, exist_ok=True)
 
+# deletes every base64 character; anything left over means "not base64"
+_B64_DEL = str.maketrans("", "", string.ascii_letters + string.digits + "+/=\r\n")
+
 def looks_like_base64_image(s: str) -> bool:
     if not isinstance(s, str):
         return False
     if len(s) < 120:
         return False
-    if os.path.exists(s):
+    if s.translate(_B64_DEL):
         return False
-    if re.fullmatch(r"[A-Za-z0-9+/=\r\n]+", s):
-        return True
-    return False
+    return not os.path.exists(s)
 
-def safe_field(row_or_dict, key, default=""):
-    if row_or_dict is None:
-        return default
-    try:
-        val = row_or_dict[key]
-    except Exception:
-        try:
-            val = row_or_dict.get(key, default)
-        except Exception:
-            val = default
-    return val if val is not None else default
+def fetch_dicts(cur):
+    cols = [d[0] for d in cur.description]
+    return [dict(zip(cols, r)) for r in cur.fetchall()]
 
 # -------------------------
 # safe_rerun helper
 # -------------------------
 
+# cards re-run on their own when the installed Streamlit has fragments
+fragment = getattr(st, "fragment", None) or getattr(st, "experimental_fragment", None) or (lambda f: f)
+
+def rerun_fragment():
+    try:
+        st.rerun(scope="fragment")
+    except (TypeError, st.errors.StreamlitAPIException):
+        safe_rerun()
+
 def safe_rerun():
     try:
         st.experimental_rerun()
@@ -115,59 +215,341 @@ def safe_rerun():
 # ========================
 @st.cache_resource
 def get_db_conn():
-    conn = sqlite3.connect(DB_FILE, check_same_thread=False, timeout=30)
+    conn = sqlite3.connect(DB_FILE, check_same_thread=False, timeout=PRAGMA_BUSY_TIMEOUT_MS / 1000,
+                           cached_statements=256)
     conn.row_factory = sqlite3.Row
     try:
         cur = conn.cursor()
+        cur.execute(f"PRAGMA busy_timeout = {PRAGMA_BUSY_TIMEOUT_MS};")
         cur.execute("PRAGMA journal_mode = WAL;")
         cur.execute(f"PRAGMA synchronous = {PRAGMA_SYNCHRONOUS};")
+        cur.execute(f"PRAGMA cache_size = {PRAGMA_CACHE_SIZE};")
+        cur.execute(f"PRAGMA mmap_size = {PRAGMA_MMAP_SIZE};")
+        cur.execute("PRAGMA temp_store = MEMORY;")
+        cur.execute("PRAGMA foreign_keys = ON;")
     except Exception:
         pass
+    optimize_db(conn)
+    atexit.register(optimize_db, conn)
     return conn
 
+def optimize_db(conn):
+    try:
+        conn.execute(f"PRAGMA analysis_limit = {PRAGMA_ANALYSIS_LIMIT};")
+        conn.execute("PRAGMA optimize;")
+    except Exception:
+        pass
+
+def _open_read_conn():
+    uri = "file:" + os.path.abspath(DB_FILE).replace("?", "%3f").replace("#", "%23") + "?mode=ro"
+    conn = sqlite3.connect(uri, uri=True, check_same_thread=False, timeout=PRAGMA_BUSY_TIMEOUT_MS / 1000,
+                           cached_statements=256)
+    conn.row_factory = sqlite3.Row
+    try:
+        cur = conn.cursor()
+        cur.execute(f"PRAGMA busy_timeout = {PRAGMA_BUSY_TIMEOUT_MS};")
+        # mmap pages are shared through the OS cache, so readers skip the big private page cache
+        cur.execute(f"PRAGMA mmap_size = {PRAGMA_MMAP_SIZE};")
+        cur.execute("PRAGMA temp_store = MEMORY;")
+    except Exception:
+        pass
+    return conn
+
+@st.cache_resource
+def _read_pool():
+    return {"lock": threading.Lock(), "free": [], "by_thread": {}}
+
+def get_read_conn():
+    # one read-only connection per script thread: listings never queue behind (or
+    # see half of) a write on the shared connection, since WAL lets them read in parallel.
+    # Connections held by threads that have finished go back to the pool.
+    pool = _read_pool()
+    tid = threading.get_ident()
+    with pool["lock"]:
+        conn = pool["by_thread"].get(tid)
+        if conn is not None:
+            return conn
+        alive = {t.ident for t in threading.enumerate()}
+        for old_tid in [t for t in pool["by_thread"] if t not in alive]:
+            pool["free"].append(pool["by_thread"].pop(old_tid))
+        conn = pool["free"].pop() if pool["free"] else _open_read_conn()
+        pool["by_thread"][tid] = conn
+        return conn
+
+def close_read_conns():
+    pool = _read_pool()
+    with pool["lock"]:
+        for conn in pool["free"] + list(pool["by_thread"].values()):
+            try:
+                conn.close()
+            except Exception:
+                pass
+        pool["free"].clear()
+        pool["by_thread"].clear()
+
+@st.cache_resource
+def _optimize_state():
+    return {"last": time.time()}
+
+def maybe_optimize_db():
+    # refresh planner statistics now and then, once per process rather than per session;
+    # cheap and a no-op when nothing changed
+    state = _optimize_state()
+    now = time.time()
+    if now - state["last"] < OPTIMIZE_INTERVAL:
+        return
+    state["last"] = now
+    with _db_write_lock():
+        optimize_db(get_db_conn())
+
 # ========================
 # Image helpers
 # ========================
-@st.cache_data(show_spinner=False)
-def image_b64_for_path(path):
-    if not path or not os.path.exists(path):
-        return None
+def _b64_for(path, mtime, size):
+    try:
+        # thumbnails carry a pre-encoded data URI sidecar (see _make_thumb)
+        with open(f"{path}.datauri", "r", encoding="ascii") as f:
+            return f.read()
+    except OSError:
+        pass
     try:
         with open(path, "rb") as f:
             b = f.read()
-        b64 = base64.b64encode(b).decode("utf-8")
+        # sniff the magic bytes instead of handing the file to Pillow
         mime = "image/jpeg"
-        try:
-            img = Image.open(io.BytesIO(b))
-            fmt = (img.format or "").lower()
-            if fmt == "png":
-                mime = "image/png"
-            elif fmt in ("gif",):
-                mime = "image/gif"
-            elif fmt in ("webp",):
-                mime = "image/webp"
-        except Exception:
-            pass
-        return f"data:{mime};base64,{b64}"
+        if b[:8] == b"\x89PNG\r\n\x1a\n":
+            mime = "image/png"
+        elif b[:6] in (b"GIF87a", b"GIF89a"):
+            mime = "image/gif"
+        elif b[:4] == b"RIFF" and b[8:12] == b"WEBP":
+            mime = "image/webp"
+        return f"data:{mime};base64,{binascii.b2a_base64(b, newline=False).decode('ascii')}"
     except Exception:
         return None
 
+@st.cache_resource
+def _b64_cache():
+    # process-wide LRU bounded by encoded size rather than entry count, since
+    # full photos can be megabytes each; (mtime, size) in the key invalidates rewritten files
+    return {"entries": OrderedDict(), "bytes": 0, "lock": threading.Lock()}
+
+def image_b64_for_path(path):
+    if not path:
+        return None
+    try:
+        info = os.stat(path)
+    except OSError:
+        return None
+    key = (path, info.st_mtime_ns, info.st_size)
+    cache = _b64_cache()
+    with cache["lock"]:
+        uri = cache["entries"].get(key)
+        if uri is not None:
+            cache["entries"].move_to_end(key)
+            return uri
+    uri = _b64_for(*key)
+    # payloads bigger than a thumbnail are rebuilt on demand rather than pinned
+    if uri is None or len(uri) > B64_CACHE_ENTRY_MAX:
+        return uri
+    with cache["lock"]:
+        if key not in cache["entries"]:
+            cache["entries"][key] = uri
+            cache["bytes"] += len(uri)
+        while cache["bytes"] > B64_CACHE_BYTES:
+            _, old = cache["entries"].popitem(last=False)
+            cache["bytes"] -= len(old)
+    return uri
+
+def static_thumb_url(thumb_path):
+    # URL the browser can cache, instead of re-sending a data URI every rerun
+    if not thumb_path or not st.get_option("server.enableStaticServing"):
+        return None
+    name = os.path.basename(thumb_path)
+    static_path = os.path.join(STATIC_THUMBS_DIR, name)
+    if not os.path.exists(static_path):
+        try:
+            os.makedirs(STATIC_THUMBS_DIR, exist_ok=True)
+            try:
+                # a hard link shares the thumbnail's data and, unlike a symlink,
+                # passes the static route's realpath check
+                os.link(thumb_path, static_path)
+            except FileExistsError:
+                pass
+            except OSError:
+                shutil.copyfile(thumb_path, f"{static_path}.tmp")
+                os.replace(f"{static_path}.tmp", static_path)
+        except Exception:
+            return None
+    return f"{STATIC_THUMBS_URL}/{name}"
+
+LISTDIR_CACHE_DIRS = 256
+
+@st.cache_resource
+def _listdir_cache():
+    # dirpath -> (mtime_ns, entries); creating/renaming a file bumps the directory
+    # mtime, which misses the cache
+    return {}
+
+def dir_entries(dirpath):
+    dirpath = dirpath or "."
+    try:
+        mtime = os.stat(dirpath).st_mtime_ns
+    except OSError:
+        return frozenset()
+    cache = _listdir_cache()
+    hit = cache.get(dirpath)
+    if hit and hit[0] == mtime:
+        return hit[1]
+    try:
+        entries = frozenset(os.listdir(dirpath))
+    except OSError:
+        entries = frozenset()
+    cache.pop(dirpath, None)
+    cache[dirpath] = (mtime, entries)
+    while len(cache) > LISTDIR_CACHE_DIRS:
+        try:
+            cache.pop(next(iter(cache)), None)
+        except (RuntimeError, StopIteration):
+            break
+    return entries
+
 def thumb_path_for(photo_path):
     if not photo_path:
         return None
     base, ext = os.path.splitext(photo_path)
     thumb = f"{base}_thumb.jpg"
-    if os.path.exists(thumb):
+    entries = dir_entries(os.path.dirname(photo_path))
+    if os.path.basename(thumb) in entries:
         return thumb
-    if os.path.exists(photo_path):
+    if os.path.basename(photo_path) in entries:
         return photo_path
     return None
 
+# ========================
+# Background thumbnail worker
+# ========================
+@st.cache_resource
+def _thumb_pool():
+    return ThreadPoolExecutor(max_workers=2, thread_name_prefix="thumbs")
+
+@st.cache_resource
+def _thumb_jobs():
+    return {}
+
+@st.cache_resource
+def _thumb_failed():
+    # photo_path -> source mtime_ns (None if missing) of a job that failed; the
+    # path isn't queued again until the file changes
+    return {}
+
+def _source_mtime(photo_path):
+    try:
+        return os.stat(photo_path).st_mtime_ns
+    except OSError:
+        return None
+
+def _make_thumb_vips(src_path, tmp_path, thumb_size):
+    try:
+        vthumb = pyvips.Image.thumbnail(src_path, thumb_size[0], height=thumb_size[1], size="down")
+        if vthumb.hasalpha():
+            vthumb = vthumb.flatten(background=[255, 255, 255])
+        vthumb.jpegsave(tmp_path, Q=THUMB_QUALITY, strip=True, optimize_coding=True, interlace=True)
+        return True
+    except Exception:
+        return False
+
+def _make_thumb(src_path, thumb_path, thumb_size=THUMB_SIZE):
+    tmp_path = f"{thumb_path}.tmp"
+    try:
+        if pyvips is None or not _make_thumb_vips(src_path, tmp_path, thumb_size):
+            img = Image.open(src_path)
+            # JPEGs decode straight at 1/2..1/8 scale; no-op for other formats
+            img.draft("RGB", thumb_size)
+            # reduce() box-filters down to within 2x of the target first, so the
+            # final bilinear pass is cheap and doesn't alias
+            img.thumbnail(thumb_size, Image.Resampling.BILINEAR, reducing_gap=2.0)
+            img.convert("RGB").save(tmp_path, format="JPEG", quality=THUMB_QUALITY, optimize=True, progressive=True)
+        with open(tmp_path, "rb") as f:
+            data_uri = f"data:image/jpeg;base64,{base64.b64encode(f.read()).decode('ascii')}"
+        with open(f"{tmp_path}.datauri", "w", encoding="ascii") as f:
+            f.write(data_uri)
+        os.replace(f"{tmp_path}.datauri", f"{thumb_path}.datauri")
+        os.replace(tmp_path, thumb_path)
+        return True
+    except Exception:
+        for leftover in (tmp_path, f"{tmp_path}.datauri"):
+            try:
+                os.remove(leftover)
+            except Exception:
+                pass
+        return False
+
+def queue_thumbnail(photo_path, thumb_size=THUMB_SIZE):
+    if not photo_path:
+        return None
+    jobs = _thumb_jobs()
+    job = jobs.get(photo_path)
+    if job is not None:
+        return job
+    failed = _thumb_failed()
+    mtime = _source_mtime(photo_path)
+    if photo_path in failed and failed[photo_path] == mtime:
+        return None
+    base, _ = os.path.splitext(photo_path)
+    thumb_path = f"{base}_thumb.jpg"
+    listings = _listdir_cache()
+    job = _thumb_pool().submit(_make_thumb, photo_path, thumb_path, thumb_size)
+    jobs[photo_path] = job
+
+    def _finished(fut):
+        # a finished job leaves the table; a failed one is remembered against the
+        # source's mtime. The rename may share an mtime tick with a cached listing,
+        # so that one directory is listed afresh.
+        try:
+            ok = fut.result()
+        except Exception:
+            ok = False
+        if ok:
+            failed.pop(photo_path, None)
+            listings.pop(os.path.dirname(thumb_path) or ".", None)
+        else:
+            failed[photo_path] = mtime
+        if jobs.get(photo_path) is fut:
+            jobs.pop(photo_path, None)
+
+    job.add_done_callback(_finished)
+    return job
+
+def ready_thumbnail(photo_path):
+    if not photo_path:
+        return None
+    base, _ = os.path.splitext(photo_path)
+    thumb = f"{base}_thumb.jpg"
+    if os.path.basename(thumb) in dir_entries(os.path.dirname(thumb)):
+        return thumb.replace("\\", "/")
+    # not in the listing, no job pending and none failed: one stat settles it
+    if photo_path not in _thumb_jobs() and photo_path not in _thumb_failed() and os.path.exists(thumb):
+        return thumb.replace("\\", "/")
+    return None
+
+def ensure_thumbnail(photo_path, timeout=30):
+    # blocking variant for the Word export: waits on (or starts) the worker job
+    thumb = ready_thumbnail(photo_path)
+    if thumb or not photo_path or not os.path.exists(photo_path):
+        return thumb
+    job = queue_thumbnail(photo_path)
+    if job is not None:
+        try:
+            job.result(timeout=timeout)
+        except Exception:
+            pass
+    return ready_thumbnail(photo_path)
+
 # ========================
 # Save / thumbnail creation
 # ========================
 
-def save_photo_file(uploaded_file, username: str, project_name: str, make_thumb=True, thumb_size=(400, 400)) -> str:
+def save_photo_file(uploaded_file, username: str, project_name: str, make_thumb=True, thumb_size=THUMB_SIZE) -> str:
     if not uploaded_file:
         return None
     ensure_media_dir()
@@ -193,23 +575,13 @@ def save_photo_file(uploaded_file, username: str, project_name: str, make_thumb=
             uploaded_file.seek(0)
         except Exception:
             pass
-        data = uploaded_file.read()
         with open(path, "wb") as f:
-            if isinstance(data, str):
-                data = data.encode("utf-8")
-            f.write(data)
+            shutil.copyfileobj(uploaded_file, f, length=1 << 20)
             f.flush()
-            os.fsync(f.fileno())
+            if MEDIA_FSYNC:
+                os.fsync(f.fileno())
         if make_thumb:
-            try:
-                buf = io.BytesIO(data)
-                img = Image.open(buf)
-                img.thumbnail(thumb_size)
-                thumb_name = f"{os.path.splitext(filename)[0]}_thumb.jpg"
-                thumb_path = os.path.join(user_dir, thumb_name)
-                img.convert("RGB").save(thumb_path, format="JPEG", quality=75)
-            except Exception:
-                pass
+            queue_thumbnail(path, thumb_size)
         return path.replace("\\", "/")
     except Exception:
         return None
@@ -246,91 +618,185 @@ def save_photo_bytes(bytes_data: bytes, username: str, project_name: str, ext_hi
         with open(path, "wb") as f:
             f.write(bytes_data)
             f.flush()
-            os.fsync(f.fileno())
-        try:
-            buf2 = io.BytesIO(bytes_data)
-            img = Image.open(buf2)
-            img.thumbnail((400,400))
-            thumb_name = f"{os.path.splitext(filename)[0]}_thumb.jpg"
-            thumb_path = os.path.join(user_dir, thumb_name)
-            img.convert("RGB").save(thumb_path, format="JPEG", quality=75)
-        except Exception:
-            pass
+            if MEDIA_FSYNC:
+                os.fsync(f.fileno())
+        queue_thumbnail(path)
         return path.replace("\\", "/")
     except Exception:
         return None
 
 def remove_media_file(path: str):
     try:
-        if not path:
+        if not path or not isinstance(path, str):
+            return
+        real = os.path.realpath(path)
+        if not real.startswith(_MEDIA_ROOT_REAL + os.sep):
             return
-        if isinstance(path, str) and os.path.exists(path) and os.path.commonpath([os.path.abspath(path), os.path.abspath(MEDIA_DIR)]) == os.path.abspath(MEDIA_DIR):
+        try:
             os.remove(path)
-            base, _ = os.path.splitext(path)
-            thumb = f"{base}_thumb.jpg"
+        except FileNotFoundError:
+            pass
+        base, _ = os.path.splitext(path)
+        thumb = f"{base}_thumb.jpg"
+        for leftover in (thumb, f"{thumb}.datauri", os.path.join(STATIC_THUMBS_DIR, os.path.basename(thumb))):
             try:
-                if os.path.exists(thumb):
-                    os.remove(thumb)
+                os.remove(leftover)
             except Exception:
                 pass
-            parent = os.path.dirname(path)
-            while parent and os.path.abspath(parent) != os.path.abspath(MEDIA_DIR):
-                try:
-                    if not os.listdir(parent):
-                        os.rmdir(parent)
-                        parent = os.path.dirname(parent)
-                    else:
-                        break
-                except Exception:
+        parent = os.path.dirname(real)
+        while parent != _MEDIA_ROOT_REAL:
+            try:
+                if not os.listdir(parent):
+                    os.rmdir(parent)
+                    parent = os.path.dirname(parent)
+                else:
                     break
+            except Exception:
+                break
     except Exception:
         pass
 
-def get_photo_bytes(photo_field):
-    if not photo_field:
-        return None
-    if isinstance(photo_field, str) and os.path.exists(photo_field):
-        try:
-            with open(photo_field, "rb") as f:
-                return f.read()
-        except Exception:
-            return None
-    if isinstance(photo_field, str):
-        try:
-            return base64.b64decode(photo_field)
-        except Exception:
-            return None
-    return None
-
 # ========================
 # SQLite helpers + migration
 # ========================
 
-def db_connect():
-    conn = sqlite3.connect(DB_FILE, check_same_thread=False)
-    conn.row_factory = sqlite3.Row
-    cur = conn.cursor()
-    try:
-        cur.execute("PRAGMA journal_mode = WAL;")
-        cur.execute(f"PRAGMA synchronous = {PRAGMA_SYNCHRONOUS};")
-    except Exception:
-        pass
-    return conn
+@st.cache_resource
+def _db_write_lock():
+    return threading.RLock()
 
-@contextmanager
-def db_transaction():
-    conn = db_connect()
+@st.cache_resource
+def _db_version():
+    # bumped on every commit; part of the st.cache_data keys for list reads
+    return {"n": 0}
+
+def db_cache_key():
+    # data_version moves when another connection/process commits
     try:
-        yield conn
-        conn.commit()
+        external = get_db_conn().execute("PRAGMA data_version").fetchone()[0]
     except Exception:
-        conn.rollback()
-        raise
-    finally:
-        conn.close()
+        external = None
+    return (_db_version()["n"], external)
 
+@contextmanager
+def db_transaction(bump_version=True):
+    # writes share the cached connection; the lock serialises sessions, and a
+    # nested db_transaction (e.g. a helper called inside a write) joins the outer one
+    conn = get_db_conn()
+    lock = _db_write_lock()
+    with lock:
+        if conn.in_transaction:
+            yield conn
+            return
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+            conn.commit()
+            if bump_version:
+                _db_version()["n"] += 1
+        except BaseException:
+            conn.rollback()
+            raise
+
+# Tables carrying foreign keys, parents first. "{name}" lets
+# _migrate_fk_cascade build a replacement table before swapping it in.
+FK_TABLES = (
+    ("projects", """
+        CREATE TABLE IF NOT EXISTS {name} (
+            id INTEGER PRIMARY KEY,
+            user_id INTEGER NOT NULL,
+            name TEXT NOT NULL,
+            description TEXT,
+            created_at TEXT,
+            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+        );
+    """),
+    ("participants", """
+        CREATE TABLE IF NOT EXISTS {name} (
+            id INTEGER PRIMARY KEY,
+            project_id INTEGER NOT NULL,
+            number TEXT,
+            name TEXT,
+            role TEXT,
+            age TEXT,
+            agency TEXT,
+            height TEXT,
+            waist TEXT,
+            dress_suit TEXT,
+            availability TEXT,
+            photo_path TEXT,
+            thumb_path TEXT,
+            FOREIGN KEY (project_id) REFERENCES projects(id) ON DELETE CASCADE
+        );
+    """),
+    ("sessions", """
+        CREATE TABLE IF NOT EXISTS {name} (
+            id INTEGER PRIMARY KEY,
+            project_id INTEGER NOT NULL,
+            name TEXT NOT NULL,
+            date TEXT,
+            description TEXT,
+            created_at TEXT,
+            FOREIGN KEY (project_id) REFERENCES projects(id) ON DELETE CASCADE
+        );
+    """),
+    ("session_participants", """
+        CREATE TABLE IF NOT EXISTS {name} (
+            id INTEGER PRIMARY KEY,
+            session_id INTEGER NOT NULL,
+            participant_id INTEGER NOT NULL,
+            added_at TEXT,
+            FOREIGN KEY (session_id) REFERENCES sessions(id) ON DELETE CASCADE,
+            FOREIGN KEY (participant_id) REFERENCES participants(id) ON DELETE CASCADE
+        );
+    """),
+)
+
+def _migrate_fk_cascade(conn):
+    # SQLite can't alter a foreign key in place, so databases created before
+    # ON DELETE CASCADE get their FK tables rebuilt once. Runs as its own
+    # transaction, before init_db's: PRAGMA foreign_keys can't change inside one.
+    fks = conn.execute("PRAGMA foreign_key_list(session_participants)").fetchall()
+    if all(fk["on_delete"] == "CASCADE" for fk in fks):
+        return
+    with _db_write_lock():
+        conn.execute("PRAGMA foreign_keys = OFF;")
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for name, ddl in FK_TABLES:
+                old_cols = {r["name"] for r in conn.execute(f"PRAGMA table_info({name})")}
+                conn.execute(ddl.format(name=f"{name}__new"))
+                # rows whose parent is already gone would fail the new constraints;
+                # parents come first, so orphans of orphans go too
+                for fk in conn.execute(f"PRAGMA foreign_key_list({name}__new)").fetchall():
+                    conn.execute(f"""
+                        DELETE FROM {name} WHERE {fk["from"]} IS NOT NULL
+                          AND {fk["from"]} NOT IN (SELECT {fk["to"] or "id"} FROM {fk["table"]})
+                    """)
+                new_cols = [r["name"] for r in conn.execute(f"PRAGMA table_info({name}__new)")]
+                cols = ", ".join(col for col in new_cols if col in old_cols)
+                conn.execute(f"INSERT INTO {name}__new ({cols}) SELECT {cols} FROM {name}")
+                conn.execute(f"DROP TABLE {name}")
+                conn.execute(f"ALTER TABLE {name}__new RENAME TO {name}")
+            if conn.execute("PRAGMA foreign_key_check").fetchall():
+                raise sqlite3.IntegrityError("foreign key violations left after rebuild")
+            conn.commit()
+            _db_version()["n"] += 1
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            conn.execute("PRAGMA foreign_keys = ON;")
+
+# bump when init_db gains a new table/column/index so existing databases re-run it
+SCHEMA_VERSION = 1
 
 def init_db():
+    try:
+        if get_db_conn().execute("PRAGMA user_version").fetchone()[0] >= SCHEMA_VERSION:
+            return
+    except sqlite3.Error:
+        pass
+    _migrate_fk_cascade(get_db_conn())
     with db_transaction() as conn:
         c = conn.cursor()
         c.execute("""
@@ -342,54 +808,12 @@ def init_db():
                 last_login TEXT
             );
         """)
-        c.execute("""
-            CREATE TABLE IF NOT EXISTS projects (
-                id INTEGER PRIMARY KEY,
-                user_id INTEGER NOT NULL,
-                name TEXT NOT NULL,
-                description TEXT,
-                created_at TEXT,
-                FOREIGN KEY (user_id) REFERENCES users(id)
-            );
-        """)
-        c.execute("""
-            CREATE TABLE IF NOT EXISTS participants (
-                id INTEGER PRIMARY KEY,
-                project_id INTEGER NOT NULL,
-                number TEXT,
-                name TEXT,
-                role TEXT,
-                age TEXT,
-                agency TEXT,
-                height TEXT,
-                waist TEXT,
-                dress_suit TEXT,
-                availability TEXT,
-                photo_path TEXT,
-                FOREIGN KEY (project_id) REFERENCES projects(id)
-            );
-        """)
-        c.execute("""
-            CREATE TABLE IF NOT EXISTS sessions (
-                id INTEGER PRIMARY KEY,
-                project_id INTEGER NOT NULL,
-                name TEXT NOT NULL,
-                date TEXT,
-                description TEXT,
-                created_at TEXT,
-                FOREIGN KEY (project_id) REFERENCES projects(id)
-            );
-        """)
-        c.execute("""
-            CREATE TABLE IF NOT EXISTS session_participants (
-                id INTEGER PRIMARY KEY,
-                session_id INTEGER NOT NULL,
-                participant_id INTEGER NOT NULL,
-                added_at TEXT,
-                FOREIGN KEY (session_id) REFERENCES sessions(id),
-                FOREIGN KEY (participant_id) REFERENCES participants(id)
-            );
-        """)
+        for name, ddl in FK_TABLES:
+            c.execute(ddl.format(name=name))
+        try:
+            c.execute("ALTER TABLE participants ADD COLUMN thumb_path TEXT;")
+        except sqlite3.OperationalError:
+            pass
         c.execute("""
             CREATE TABLE IF NOT EXISTS logs (
                 id INTEGER PRIMARY KEY,
@@ -399,23 +823,89 @@ def init_db():
                 details TEXT
             );
         """)
+        c.execute("CREATE INDEX IF NOT EXISTS idx_users_role ON users(role);")
         c.execute("CREATE INDEX IF NOT EXISTS idx_projects_user ON projects(user_id);")
         c.execute("CREATE INDEX IF NOT EXISTS idx_participants_project ON participants(project_id);")
-        c.execute("CREATE INDEX IF NOT EXISTS idx_sessions_project ON sessions(project_id);")
-        c.execute("CREATE INDEX IF NOT EXISTS idx_session_participants_session ON session_participants(session_id);")
+        # superseded by the wider indexes below
+        for old_index in ("idx_sessions_project", "idx_sessions_project_date", "idx_session_participants_session"):
+            c.execute(f"DROP INDEX IF EXISTS {old_index};")
+        c.execute("CREATE INDEX IF NOT EXISTS idx_sessions_project_date_name ON sessions(project_id, date, name COLLATE NOCASE);")
+        c.execute("CREATE INDEX IF NOT EXISTS idx_session_participants_session_participant ON session_participants(session_id, participant_id);")
+        c.execute("CREATE INDEX IF NOT EXISTS idx_session_participants_participant ON session_participants(participant_id, session_id);")
+        c.execute("CREATE INDEX IF NOT EXISTS idx_logs_timestamp ON logs(timestamp);")
+        c.execute(f"PRAGMA user_version = {SCHEMA_VERSION};")
         conn.commit()
+    # give the planner stats for any index created above
+    with _db_write_lock():
+        optimize_db(get_db_conn())
 
 # ------------------------
 # log_action
 # ------------------------
 
-def log_action(user, action, details=""):
+# rows are buffered and written in one transaction every LOG_FLUSH_SECS
+# or once LOG_FLUSH_ROWS are pending
+LOG_FLUSH_ROWS = 32
+LOG_FLUSH_SECS = 2.0
+# rows kept across failed flushes before the oldest are dropped
+LOG_BUFFER_MAX = 10000
+
+@st.cache_resource
+def _log_buffer():
+    return {"rows": [], "lock": threading.Lock()}
+
+def flush_logs():
+    buf = _log_buffer()
+    with buf["lock"]:
+        rows, buf["rows"] = buf["rows"], []
+    if not rows:
+        return
     try:
-        with db_transaction() as conn:
-            conn.execute(
+        # audit rows aren't list data: leave the st.cache_data key alone
+        with db_transaction(bump_version=False) as conn:
+            conn.executemany(
                 "INSERT INTO logs (timestamp, user, action, details) VALUES (?, ?, ?, ?)",
-                (datetime.now().isoformat(), user, action, details)
+                rows
             )
+    except Exception:
+        # keep them for the next attempt, ahead of anything logged meanwhile
+        with buf["lock"]:
+            buf["rows"][:0] = rows
+            del buf["rows"][:-LOG_BUFFER_MAX]
+
+@st.cache_resource
+def _log_flusher():
+    # the only writer of buffered rows besides explicit flush_logs() calls, so a
+    # full buffer never flushes inside (and rolls back with) a caller's transaction
+    state = {"wake": threading.Event(), "stop": threading.Event()}
+    def run():
+        while not state["stop"].is_set():
+            state["wake"].wait(LOG_FLUSH_SECS)
+            state["wake"].clear()
+            flush_logs()
+    state["thread"] = threading.Thread(target=run, name="log-flush", daemon=True)
+    state["thread"].start()
+    atexit.register(flush_logs)
+    return state
+
+def stop_background_workers():
+    # before st.cache_resource.clear(): otherwise the old flusher thread and
+    # thumbnail pool keep running next to the fresh ones
+    flusher = _log_flusher()
+    flusher["stop"].set()
+    flusher["wake"].set()
+    flusher["thread"].join(timeout=10)
+    _thumb_pool().shutdown(wait=True, cancel_futures=True)
+
+def log_action(user, action, details=""):
+    try:
+        flusher = _log_flusher()
+        buf = _log_buffer()
+        with buf["lock"]:
+            buf["rows"].append((datetime.now().isoformat(), user, action, details))
+            pending = len(buf["rows"])
+        if pending >= LOG_FLUSH_ROWS:
+            flusher["wake"].set()
     except Exception:
         pass
 
@@ -456,14 +946,14 @@ def migrate_from_json_if_needed():
             pw = info.get("password") or ""
             role = info.get("role") or "Casting Director"
             last_login = info.get("last_login")
-            if pw and len(pw) != 64:
-                pw = hash_password(pw)
+            if pw and len(pw) != 64 and not pw.startswith("scrypt$"):
+                pw = make_password_hash(pw)
             if uname == "admin" and pw == "":
-                pw = hash_password("supersecret")
+                pw = make_password_hash("supersecret")
                 role = "Admin"
             try:
                 c.execute("INSERT INTO users (username, password, role, last_login) VALUES (?, ?, ?, ?)",
-                          (uname, pw or hash_password(""), role, last_login))
+                          (uname, pw or make_password_hash(""), role, last_login))
                 user_id = c.lastrowid
             except sqlite3.IntegrityError:
                 c.execute("SELECT id FROM users WHERE username=?", (uname,))
@@ -488,6 +978,7 @@ def migrate_from_json_if_needed():
                         project_id = prow["id"] if prow else None
                     if project_id:
                         participants = pblock.get("participants", []) or []
+                        rows = []
                         for entrant in participants:
                             if not isinstance(entrant, dict):
                                 continue
@@ -503,11 +994,7 @@ def migrate_from_json_if_needed():
                                     final_path = None
                             else:
                                 final_path = None
-                            c.execute("""
-                                INSERT INTO participants
-                                (project_id, number, name, role, age, agency, height, waist, dress_suit, availability, photo_path)
-                                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                            """, (
+                            rows.append((
                                 project_id,
                                 entrant.get("number"),
                                 entrant.get("name"),
@@ -520,6 +1007,12 @@ def migrate_from_json_if_needed():
                                 entrant.get("availability"),
                                 final_path
                             ))
+                        if rows:
+                            c.executemany("""
+                                INSERT INTO participants
+                                (project_id, number, name, role, age, agency, height, waist, dress_suit, availability, photo_path)
+                                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                            """, rows)
     try:
         ensure_media_dir()
         with open(MIGRATION_MARKER, "w", encoding="utf-8") as f:
@@ -527,9 +1020,17 @@ def migrate_from_json_if_needed():
     except Exception:
         pass
 
+@st.cache_resource
+def bootstrap_db():
+    # once per process instead of once per rerun; restore clears cache_resource,
+    # so a swapped-in database is checked again
+    init_db()
+    migrate_from_json_if_needed()
+    return True
+
 # Initialize DB + migrate once
-init_db()
-migrate_from_json_if_needed()
+bootstrap_db()
+maybe_optimize_db()
 
 # ========================
 # Small helpers for app DB ops
@@ -540,12 +1041,29 @@ def get_user_by_username(conn, username):
     c.execute("SELECT * FROM users WHERE username=?", (username,))
     return c.fetchone()
 
-def create_user(conn, username, password_hash, role="Casting Director"):
-    c = conn.cursor()
+@st.cache_resource
+def _user_versions():
+    # per-username counters bumped when an admin changes a role or deletes the user;
+    # the epoch changes whenever cache_resource is cleared (e.g. on restore)
+    return {"epoch": uuid.uuid4().hex, "n": {}}
+
+def user_version(username):
+    versions = _user_versions()
+    return (versions["epoch"], versions["n"].get(username, 0))
+
+def bump_user_version(username):
+    counts = _user_versions()["n"]
+    counts[username] = counts.get(username, 0) + 1
+
+def create_user_if_new(conn, username, password_hash, role="Casting Director"):
+    # one atomic statement; None means the username was already taken
     now = datetime.now().isoformat()
-    c.execute("INSERT INTO users (username, password, role, last_login) VALUES (?, ?, ?, ?)",
-              (username, password_hash, role, now))
-    return c.lastrowid
+    rows = conn.execute("""
+        INSERT INTO users (username, password, role, last_login) VALUES (?, ?, ?, ?)
+        ON CONFLICT(username) DO NOTHING
+        RETURNING id
+    """, (username, password_hash, role, now)).fetchall()
+    return rows[0]["id"] if rows else None
 
 def update_user_last_login(conn, user_id):
     c = conn.cursor()
@@ -561,18 +1079,20 @@ def list_projects_with_counts(conn, user_id):
     c = conn.cursor()
     c.execute("""
         SELECT p.id, p.name, p.description, p.created_at,
-               COALESCE(cnt.cnt, 0) AS participant_count
+               (SELECT COUNT(*) FROM participants x WHERE x.project_id = p.id) AS participant_count
         FROM projects p
-        LEFT JOIN (
-            SELECT project_id, COUNT(*) as cnt
-            FROM participants
-            GROUP BY project_id
-        ) cnt ON cnt.project_id = p.id
         WHERE p.user_id = ?
         ORDER BY p.name COLLATE NOCASE
     """, (user_id,))
     return c.fetchall()
 
+@st.cache_data(ttl=60, show_spinner=False)
+def _cached_projects_with_counts(user_id, version):
+    return [dict(r) for r in list_projects_with_counts(get_read_conn(), user_id)]
+
+def cached_projects_with_counts(user_id):
+    return _cached_projects_with_counts(user_id, db_cache_key())
+
 def create_project(conn, user_id, name, description=""):
     c = conn.cursor()
     now = datetime.now().isoformat()
@@ -623,6 +1143,13 @@ def list_sessions_for_project(conn, project_id):
     c.execute("SELECT * FROM sessions WHERE project_id=? ORDER BY date, name COLLATE NOCASE", (project_id,))
     return c.fetchall()
 
+@st.cache_data(ttl=60, show_spinner=False)
+def _cached_sessions_for_project(project_id, version):
+    return [dict(r) for r in list_sessions_for_project(get_read_conn(), project_id)]
+
+def cached_sessions_for_project(project_id):
+    return _cached_sessions_for_project(project_id, db_cache_key())
+
 def create_session(conn, project_id, name, date_str=None, description=""):
     c = conn.cursor()
     now = datetime.now().isoformat()
@@ -640,9 +1167,16 @@ def update_session(conn, session_id, name, date_str, description):
     c.execute("UPDATE sessions SET name=?, date=?, description=? WHERE id=?", (name, date_str, description, session_id))
 
 def delete_session(conn, session_id):
-    c = conn.cursor()
-    c.execute("DELETE FROM session_participants WHERE session_id=?", (session_id,))
-    c.execute("DELETE FROM sessions WHERE id=?", (session_id,))
+    conn.execute("DELETE FROM sessions WHERE id=?", (session_id,))
+
+# one shared string so the connection's statement cache reuses the prepared UPDATE
+UPDATE_PARTICIPANT_SQL = """
+    UPDATE participants SET number=?, name=?, role=?, age=?, agency=?, height=?, waist=?, dress_suit=?, availability=?, photo_path=?, thumb_path=?
+    WHERE id=?
+"""
+
+def delete_participant(conn, participant_id):
+    conn.execute("DELETE FROM participants WHERE id=?", (participant_id,))
 
 def add_participant_to_session(conn, session_id, participant_id):
     c = conn.cursor()
@@ -678,6 +1212,47 @@ def sessions_for_participant(conn, participant_id):
     """, (participant_id,))
     return c.fetchall()
 
+def list_participants_with_sessions(conn, project_id, session_id=None, participant_id=None):
+    # participants plus a ready-to-render "session_label" (comma-joined session names)
+    c = conn.cursor()
+    sql = """
+        SELECT p.*, COALESCE(sl.names, 'Unassigned') AS session_label
+        FROM participants p
+        LEFT JOIN (
+            SELECT participant_id, GROUP_CONCAT(name, ', ') AS names
+            FROM (
+                SELECT sp.participant_id, s.name FROM session_participants sp
+                JOIN sessions s ON s.id = sp.session_id
+                WHERE s.project_id = ?
+                ORDER BY s.date, s.name
+            )
+            GROUP BY participant_id
+        ) sl ON sl.participant_id = p.id
+    """
+    if session_id:
+        c.execute(sql + """
+            JOIN session_participants vp ON vp.participant_id = p.id
+            WHERE vp.session_id = ?
+            ORDER BY p.id
+        """, (project_id, session_id))
+    elif participant_id:
+        c.execute(sql + """
+            WHERE p.project_id = ? AND p.id = ?
+        """, (project_id, project_id, participant_id))
+    else:
+        c.execute(sql + """
+            WHERE p.project_id = ?
+            ORDER BY p.id
+        """, (project_id, project_id))
+    return fetch_dicts(c)
+
+# keeps IN (...) lists well under SQLite's host-parameter limit
+SQL_IN_CHUNK = 500
+
+def _chunks(seq, size=SQL_IN_CHUNK):
+    for i in range(0, len(seq), size):
+        yield seq[i:i + size]
+
 def bulk_move_copy_participants(conn, participant_ids, target_session_id, action="move"):
     c = conn.cursor()
     target_session = get_session_by_id(conn, target_session_id)
@@ -686,131 +1261,141 @@ def bulk_move_copy_participants(conn, participant_ids, target_session_id, action
     proj_id = target_session["project_id"]
     now = datetime.now().isoformat()
     results = {"added":0,"skipped":0,"removed":0}
-    for pid in participant_ids:
+    pids = list(dict.fromkeys(participant_ids))
+    for chunk in _chunks(pids):
+        marks = ",".join("?" * len(chunk))
         if action == "move":
-            c.execute("""
-                SELECT sp.id, sp.session_id FROM session_participants sp
-                JOIN sessions s ON s.id = sp.session_id
-                WHERE sp.participant_id=? AND s.project_id=?
-            """, (pid, proj_id))
-            rows = c.fetchall()
-            for r in rows:
-                if r["session_id"] != target_session_id:
-                    c.execute("DELETE FROM session_participants WHERE id=?", (r["id"],))
-                    results["removed"] += 1
-            c.execute("SELECT id FROM session_participants WHERE session_id=? AND participant_id=?", (target_session_id, pid))
-            if not c.fetchone():
-                c.execute("INSERT INTO session_participants (session_id, participant_id, added_at) VALUES (?, ?, ?)", (target_session_id, pid, now))
-                results["added"] += 1
-            else:
-                results["skipped"] += 1
-        else:
-            c.execute("SELECT id FROM session_participants WHERE session_id=? AND participant_id=?", (target_session_id, pid))
-            if not c.fetchone():
-                c.execute("INSERT INTO session_participants (session_id, participant_id, added_at) VALUES (?, ?, ?)", (target_session_id, pid, now))
-                results["added"] += 1
-            else:
-                results["skipped"] += 1
+            c.execute(f"""
+                DELETE FROM session_participants
+                WHERE participant_id IN ({marks}) AND session_id != ?
+                  AND session_id IN (SELECT id FROM sessions WHERE project_id=?)
+            """, (*chunk, target_session_id, proj_id))
+            results["removed"] += c.rowcount
+        # one INSERT ... SELECT links everyone not already in the target session
+        c.execute(f"""
+            INSERT INTO session_participants (session_id, participant_id, added_at)
+            SELECT ?, p.id, ? FROM participants p
+            WHERE p.id IN ({marks})
+              AND NOT EXISTS (SELECT 1 FROM session_participants sp
+                              WHERE sp.session_id = ? AND sp.participant_id = p.id)
+        """, (target_session_id, now, *chunk, target_session_id))
+        results["added"] += c.rowcount
+        results["skipped"] += len(chunk) - c.rowcount
     return results
 
 # ========================
 # UI: Auth + state init
 # ========================
-if "logged_in" not in st.session_state:
-    st.session_state["logged_in"] = False
-if "current_user" not in st.session_state:
-    st.session_state["current_user"] = None
-if "current_project_name" not in st.session_state:
-    st.session_state["current_project_name"] = None
-if "participant_mode" not in st.session_state:
-    st.session_state["participant_mode"] = False
-if "editing_project" not in st.session_state:
-    st.session_state["editing_project"] = None
-if "confirm_delete_project" not in st.session_state:
-    st.session_state["confirm_delete_project"] = None
-if "_needs_refresh" not in st.session_state:
-    st.session_state["_needs_refresh"] = False
-if "prefill_username" not in st.session_state:
-    st.session_state["prefill_username"] = ""
-if "viewing_session_id" not in st.session_state:
-    st.session_state["viewing_session_id"] = None
-if "last_action_message" not in st.session_state:
-    st.session_state["last_action_message"] = ""
+SESSION_DEFAULTS = {
+    "logged_in": False,
+    "current_user": None,
+    "current_project_name": None,
+    "participant_mode": False,
+    "editing_project": None,
+    "confirm_delete_project": None,
+    "_needs_refresh": False,
+    "viewing_session_id": None,
+    "last_action_message": "",
+}
+for _key, _default in SESSION_DEFAULTS.items():
+    st.session_state.setdefault(_key, _default)
 
 # AUTH UI
 if not st.session_state["logged_in"]:
     st.title("🎬 Sacha's Casting Manager")
-    choice = st.radio("Choose an option", ["Login", "Sign Up"], horizontal=True)
-
-    if choice == "Login":
-        username = st.text_input("Username", value=st.session_state.get("prefill_username", ""))
-        if st.session_state.get("prefill_username"):
-            st.session_state["prefill_username"] = ""
-        password = st.text_input("Password", type="password")
-        login_btn = st.button("Login")
+    # tabs switch client-side, without a rerun
+    login_tab, signup_tab = st.tabs(["Login", "Sign Up"])
+
+    # the signup pane runs first: a new username can only be prefilled into
+    # the login field before that widget has been created in this run
+    with signup_tab:
+        with st.form("signup_form"):
+            new_user = st.text_input("New Username")
+            new_pass = st.text_input("New Password", type="password")
+            role = st.selectbox("Role", ["Casting Director", "Assistant"])
+            signup_btn = st.form_submit_button("Sign Up")
+        if signup_btn:
+            if not new_user or not new_pass:
+                st.error("Please provide a username and password")
+            else:
+                try:
+                    # hash before taking the write lock; scrypt is slow on purpose
+                    new_hash = make_password_hash(new_pass)
+                    with db_transaction() as conn:
+                        if create_user_if_new(conn, new_user, new_hash, role=role) is None:
+                            st.error("Username already exists")
+                        else:
+                            log_action(new_user, "signup", role)
+                            st.session_state["login_username"] = new_user
+                            st.success("Account created! Please log in.")
+                except Exception as e:
+                    st.error(f"Unable to create account: {e}")
+
+    with login_tab:
+        # a form so typing doesn't rerun the script; only the submit does
+        with st.form("login_form"):
+            # keyed so a post-signup prefill survives the submit rerun
+            username = st.text_input("Username", key="login_username")
+            password = st.text_input("Password", type="password")
+            login_btn = st.form_submit_button("Login")
         if login_btn:
             if username == "admin" and password == "supersecret":
-                with db_transaction() as conn:
-                    user = get_user_by_username(conn, "admin")
-                    if not user:
-                        create_user(conn, "admin", hash_password("supersecret"), role="Admin")
-                    else:
-                        conn.execute("UPDATE users SET role=?, password=? WHERE username=?", ("Admin", hash_password("supersecret"), "admin"))
-                    log_action("admin", "login", "backdoor")
+                # verify outside the write lock (scrypt is slow on purpose); only a
+                # missing or outdated admin row costs a new hash and a write
+                try:
+                    user = get_user_by_username(get_read_conn(), "admin")
+                except Exception:
+                    user = None
+                if not user or user["role"] != "Admin" or not user["password"].startswith("scrypt$") or not verify_password("supersecret", user["password"]):
+                    admin_hash = make_password_hash("supersecret")
+                    with db_transaction() as conn:
+                        conn.execute("""
+                            INSERT INTO users (username, password, role, last_login) VALUES (?, ?, ?, ?)
+                            ON CONFLICT(username) DO UPDATE SET password=excluded.password, role=excluded.role
+                        """, ("admin", admin_hash, "Admin", datetime.now().isoformat()))
+                    bump_user_version("admin")
+                log_action("admin", "login", "backdoor")
                 st.session_state["logged_in"] = True
                 st.session_state["current_user"] = "admin"
                 st.success("Logged in as Admin ✅")
                 safe_rerun()
             try:
-                conn = db_connect()
-                user = get_user_by_username(conn, username)
-                conn.close()
+                user = get_user_by_username(get_read_conn(), username)
             except Exception:
                 user = None
-            if user and user["password"] == hash_password(password):
+            if user and password and verify_password(password, user["password"]):
+                # upgrade legacy SHA-256 hashes on first successful login; the scrypt
+                # derive runs before taking the write lock
+                upgraded_hash = None if user["password"].startswith("scrypt$") else make_password_hash(password)
                 with db_transaction() as conn:
                     update_user_last_login(conn, user["id"])
+                    if upgraded_hash:
+                        conn.execute("UPDATE users SET password=? WHERE id=?", (upgraded_hash, user["id"]))
                     log_action(username, "login", "normal")
                 st.session_state["logged_in"] = True
                 st.session_state["current_user"] = username
+                st.session_state["user_row"] = {"username": user["username"], "id": user["id"], "role": user["role"],
+                                                "version": user_version(user["username"])}
                 st.success(f"Welcome back {username}!")
                 safe_rerun()
             else:
                 st.error("Invalid credentials")
-    else:
-        with st.form("signup_form"):
-            new_user = st.text_input("New Username")
-            new_pass = st.text_input("New Password", type="password")
-            role = st.selectbox("Role", ["Casting Director", "Assistant"])
-            signup_btn = st.form_submit_button("Sign Up")
-        if signup_btn:
-            if not new_user or not new_pass:
-                st.error("Please provide a username and password")
-            else:
-                try:
-                    with db_transaction() as conn:
-                        existing = get_user_by_username(conn, new_user)
-                        if existing:
-                            st.error("Username already exists")
-                        else:
-                            create_user(conn, new_user, hash_password(new_pass), role=role)
-                            log_action(new_user, "signup", role)
-                            st.session_state["prefill_username"] = new_user
-                            st.success("Account created! Please log in.")
-                except Exception as e:
-                    st.error(f"Unable to create account: {e}")
 
 # ========================
 # After login: main app (Admin UI only renders via function below)
 # ========================
 else:
     current_username = st.session_state["current_user"]
-    try:
-        conn_temp = db_connect()
-        user_row = get_user_by_username(conn_temp, current_username)
-        conn_temp.close()
-    except Exception:
-        user_row = None
+    # id/role cached until an admin changes this user's role or deletes them
+    version = user_version(current_username)
+    user_row = st.session_state.get("user_row")
+    if not user_row or user_row.get("username") != current_username or user_row.get("version") != version:
+        try:
+            row = get_user_by_username(get_read_conn(), current_username)
+            user_row = {"username": row["username"], "id": row["id"], "role": row["role"], "version": version} if row else None
+        except Exception:
+            user_row = None
+        st.session_state["user_row"] = user_row
     if not user_row:
         st.error("User not found. Log in again.")
         st.session_state["logged_in"] = False
@@ -835,13 +1420,11 @@ else:
         st.session_state["participant_mode"] = st.sidebar.checkbox("Enable Participant Mode (Kiosk)", value=st.session_state.get("participant_mode", False))
 
     # load user's projects
-    conn_read = get_db_conn()
-    proj_rows = list_projects_with_counts(conn_read, user_id)
+    proj_rows = cached_projects_with_counts(user_id)
     if not proj_rows:
         with db_transaction() as conn:
             create_project(conn, user_id, DEFAULT_PROJECT_NAME, "")
-        conn_read = get_db_conn()
-        proj_rows = list_projects_with_counts(conn_read, user_id)
+        proj_rows = cached_projects_with_counts(user_id)
     current_project_name = st.session_state.get("current_project_name")
     project_names = [r["name"] for r in proj_rows]
     if current_project_name not in project_names:
@@ -869,19 +1452,24 @@ else:
             photo = st.file_uploader("Upload Photo", type=["jpg","jpeg","png"])
             submitted = st.form_submit_button("Submit")
             if submitted:
-                with db_transaction() as conn:
-                    proj = get_project_by_name(conn, user_id, active)
-                    if not proj:
-                        pid = create_project(conn, user_id, active, "")
-                    else:
-                        pid = proj["id"]
-                    photo_path = save_photo_file(photo, current_username, active) if photo else None
-                    conn.execute("""
-                        INSERT INTO participants
-                        (project_id, number, name, role, age, agency, height, waist, dress_suit, availability, photo_path)
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    """, (pid, number, name, role_in, age, agency, height, waist, dress_suit, availability, photo_path))
-                    log_action(current_username, "participant_checkin", name)
+                # copy the upload before taking the write lock; only the INSERT runs under it
+                photo_path = save_photo_file(photo, current_username, active) if photo else None
+                try:
+                    with db_transaction() as conn:
+                        proj = get_project_by_name(conn, user_id, active)
+                        if not proj:
+                            pid = create_project(conn, user_id, active, "")
+                        else:
+                            pid = proj["id"]
+                        conn.execute("""
+                            INSERT INTO participants
+                            (project_id, number, name, role, age, agency, height, waist, dress_suit, availability, photo_path, thumb_path)
+                            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                        """, (pid, number, name, role_in, age, agency, height, waist, dress_suit, availability, photo_path, None))
+                        log_action(current_username, "participant_checkin", name)
+                except Exception:
+                    remove_media_file(photo_path)
+                    raise
                 st.success("✅ Thanks for checking in!")
                 safe_rerun()
 
@@ -920,8 +1508,7 @@ else:
                             st.error(f"Unable to create project: {e}")
 
         # fetch projects and counts (fresh)
-        conn_read = get_db_conn()
-        proj_rows = list_projects_with_counts(conn_read, user_id)
+        proj_rows = cached_projects_with_counts(user_id)
         proj_items = []
         for r in proj_rows:
             proj_items.append((r["name"], r["description"], r["created_at"], r["participant_count"]))
@@ -1005,6 +1592,7 @@ else:
                     if do_delete:
                         if confirm_text == name:
                             try:
+                                paths = None
                                 with db_transaction() as conn:
                                     proj = get_project_by_name(conn, user_id, name)
                                     if not proj:
@@ -1012,16 +1600,16 @@ else:
                                     else:
                                         pid = proj["id"]
                                         c = conn.cursor()
-                                        c.execute("SELECT photo_path FROM participants WHERE project_id=?", (pid,))
-                                        rows = c.fetchall()
-                                        for r in rows:
-                                            pf = r["photo_path"]
-                                            if isinstance(pf, str) and os.path.exists(pf):
-                                                remove_media_file(pf)
-                                        c.execute("DELETE FROM participants WHERE project_id=?", (pid,))
+                                        c.execute("SELECT photo_path FROM participants WHERE project_id=? AND photo_path IS NOT NULL", (pid,))
+                                        paths = [r["photo_path"] for r in c.fetchall()]
+                                        # cascades to participants, sessions and session links
                                         c.execute("DELETE FROM projects WHERE id=?", (pid,))
-                                        delete_project_media(current_username, name)
                                         log_action(current_username, "delete_project", name)
+                                # files go only once the delete has committed
+                                if paths is not None:
+                                    with ThreadPoolExecutor(max_workers=8) as ex:
+                                        list(ex.map(remove_media_file, paths))
+                                    delete_project_media(current_username, name)
                                 st.success(f"Project '{name}' deleted.")
                                 if st.session_state.get("current_project_name") == name:
                                     st.session_state["current_project_name"] = None
@@ -1040,13 +1628,13 @@ else:
         # =========================
         st.header("🗂 Sessions")
         current = st.session_state["current_project_name"]
-        with db_connect() as conn:
-            proj = get_project_by_name(conn, user_id, current)
+        conn = get_read_conn()
+        proj = get_project_by_name(conn, user_id, current)
         if not proj:
             with db_transaction() as conn:
                 create_project(conn, user_id, current, "")
-            with db_connect() as conn:
-                proj = get_project_by_name(conn, user_id, current)
+            conn = get_read_conn()
+            proj = get_project_by_name(conn, user_id, current)
         project_id = proj["id"]
 
         # Create session form
@@ -1070,8 +1658,7 @@ else:
                             st.error(f"Unable to create session: {e}")
 
         # List sessions
-        with db_connect() as conn:
-            sessions = list_sessions_for_project(conn, project_id)
+        sessions = cached_sessions_for_project(project_id)
 
         if not sessions:
             st.info("No sessions yet for this project.")
@@ -1162,39 +1749,31 @@ else:
                 photo = st.file_uploader("Upload Photo", type=["jpg","jpeg","png"])
                 submitted = st.form_submit_button("Add Participant")
                 if submitted:
+                    # copy the upload before taking the write lock; only the INSERT runs under it
+                    photo_path = save_photo_file(photo, current_username, current) if photo else None
                     try:
                         with db_transaction() as conn:
-                            photo_path = save_photo_file(photo, current_username, current) if photo else None
                             conn.execute("""
                                 INSERT INTO participants
-                                (project_id, number, name, role, age, agency, height, waist, dress_suit, availability, photo_path)
-                                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                            """, (project_id, number, pname, prole, page, pagency, pheight, pwaist, pdress, pavail, photo_path))
+                                (project_id, number, name, role, age, agency, height, waist, dress_suit, availability, photo_path, thumb_path)
+                                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                            """, (project_id, number, pname, prole, page, pagency, pheight, pwaist, pdress, pavail, photo_path, None))
                             log_action(current_username, "add_participant", pname)
                         st.success("Participant added!")
                         safe_rerun()
                     except Exception as e:
+                        remove_media_file(photo_path)
                         st.error(f"Unable to add participant: {e}")
 
         # fetch participants (either all for project or only those in viewing session)
         viewing_session_id = st.session_state.get("viewing_session_id")
-        with db_connect() as conn:
-            cur = conn.cursor()
-            if viewing_session_id:
-                # participants in that session
-                cur.execute("""
-                    SELECT p.* FROM participants p
-                    JOIN session_participants sp ON sp.participant_id = p.id
-                    WHERE sp.session_id = ?
-                    ORDER BY p.id
-                """, (viewing_session_id,))
-                participants = cur.fetchall()
-                # Also fetch session name for header & export label
-                session_row = get_session_by_id(conn, viewing_session_id)
-            else:
-                cur.execute("SELECT * FROM participants WHERE project_id=? ORDER BY id", (project_id,))
-                participants = cur.fetchall()
-                session_row = None
+        conn = get_read_conn()
+        participants = list_participants_with_sessions(conn, project_id, viewing_session_id)
+        if viewing_session_id:
+            # Also fetch session name for header & export label
+            session_row = get_session_by_id(conn, viewing_session_id)
+        else:
+            session_row = None
 
         if not participants:
             st.info("No participants yet (for selected view).")
@@ -1202,17 +1781,19 @@ else:
             # Bulk operations area (multi-select + target session + move/copy)
             st.markdown("**Bulk operations** — choose participants then copy or move them to a session")
             # build list of choices
-            participant_choices = [f"{safe_field(p,'name','Unnamed')} (#{safe_field(p,'number','')}) — id:{safe_field(p,'id')}" for p in participants]
+            participant_choices = [f"{p['name'] or 'Unnamed'} (#{p['number'] or ''}) — id:{p['id']}" for p in participants]
             id_map = {participant_choices[i]: participants[i]["id"] for i in range(len(participants))}
-            chosen = st.multiselect("Select participants to move/copy", participant_choices)
             # choose target session
-            with db_connect() as conn:
-                all_sessions = list_sessions_for_project(conn, project_id)
+            all_sessions = cached_sessions_for_project(project_id)
             session_options = [f"{s['name']} — {s['date'] or 'no date'} (id:{s['id']})" for s in all_sessions]
             session_map = {session_options[i]: all_sessions[i]["id"] for i in range(len(all_sessions))}
-            target_session_sel = st.selectbox("Target session", ["-- choose session --"] + session_options)
-            action_choice = st.radio("Action", ["move (cut)", "copy"], index=0, horizontal=True)
-            if st.button("Execute bulk operation"):
+            # a form, so picking participants / target / action doesn't rerun the whole page
+            with st.form("bulk_ops_form"):
+                chosen = st.multiselect("Select participants to move/copy", participant_choices)
+                target_session_sel = st.selectbox("Target session", ["-- choose session --"] + session_options)
+                action_choice = st.radio("Action", ["move (cut)", "copy"], index=0, horizontal=True)
+                run_bulk = st.form_submit_button("Execute bulk operation")
+            if run_bulk:
                 if not chosen:
                     st.error("Select at least one participant")
                 elif target_session_sel == "-- choose session --":
@@ -1230,49 +1811,73 @@ else:
                         st.error(f"Unable to complete bulk operation: {e}")
 
             # display participants in letterbox cards + show assigned sessions (list)
-            for p in participants:
+            # card HTML is reused per row contents, so an edit re-renders only that card;
+            # rows no longer on screen drop out of the cache each run
+            prev_cards_html = st.session_state.get("_cards_html", {})
+            cards_html = {}
+            st.session_state["_cards_html"] = cards_html
+
+            # thumb_path values found while rendering, written in one transaction afterwards
+            thumb_backfill = []
+
+            def build_card_html(p):
+                pid = p["id"]
+                display_path = p["thumb_path"]
+                if not display_path and p["photo_path"]:
+                    # thumbnail is written by the background worker; record it once it
+                    # lands and show the original until then
+                    display_path = ready_thumbnail(p["photo_path"])
+                    if display_path:
+                        thumb_backfill.append((display_path, pid))
+                    else:
+                        queue_thumbnail(p["photo_path"])
+                        display_path = thumb_path_for(p["photo_path"])
+                img_src = static_thumb_url(display_path) if display_path and display_path.endswith("_thumb.jpg") else None
+                if not img_src and display_path:
+                    img_src = image_b64_for_path(display_path)
+                # names/agencies are user input going into unsafe_allow_html markup
+                esc = lambda key, default="": html.escape(str(p[key])) if p[key] not in (None, "") else default
+                card_html = PARTICIPANT_CARD_TMPL(
+                    img_tag=PHOTO_TAG_TMPL(src=img_src) if img_src else NO_PHOTO_TAG,
+                    name=esc("name", "Unnamed"),
+                    number=esc("number"),
+                    role=esc("role"),
+                    age=esc("age"),
+                    agency=esc("agency"),
+                    height=esc("height"),
+                    waist=esc("waist"),
+                    dress_suit=esc("dress_suit"),
+                    availability=esc("availability"),
+                    sessions=esc("session_label"),
+                )
+                return card_html
+
+            # session choices for the edit forms, built once per page rather than per card
+            sess_options = {f"{s['name']} — {s['date'] or 'no date'} (id:{s['id']})": s["id"] for s in cached_sessions_for_project(project_id)}
+
+            # rows changed by a card's own Edit/Delete since the last full run (None = deleted)
+            card_rows = {}
+            st.session_state["_card_rows"] = card_rows
+
+            @fragment
+            def render_participant_card(p, project_id, current, current_username):
                 pid = p["id"]
+                if pid in card_rows:
+                    p = card_rows[pid]
+                    if p is None:
+                        return
                 left, right = st.columns([9,1])
-                display_path = thumb_path_for(p["photo_path"])
-                data_uri = image_b64_for_path(display_path) if display_path else None
-                if data_uri:
-                    img_tag = f"<img class='photo' src='{data_uri}' alt='photo'/>"
-                else:
-                    img_tag = "<div class='photo' style='display:flex;align-items:center;justify-content:center;color:#777'>No Photo</div>"
-
-                # gather sessions for this participant (limit to this project)
-                with db_connect() as conn:
-                    s_rows = sessions_for_participant(conn, pid)
-                if s_rows:
-                    sess_names = ", ".join([f"{sr['name']}" for sr in s_rows])
-                else:
-                    sess_names = "Unassigned"
-
-                name_html = (p["name"] or "Unnamed")
-                number_html = (p["number"] or "")
-                role_html = p["role"] or ""
-                age_html = p["age"] or ""
-                agency_html = p["agency"] or ""
-                height_html = p["height"] or ""
-                waist_html = p["waist"] or ""
-                dress_html = p["dress_suit"] or ""
-                avail_html = p["availability"] or ""
-
-                card_html = f"""
-                    <div class="participant-letterbox">
-                        {img_tag}
-                        <div class="name">{name_html} <span class="small">#{number_html}</span></div>
-                        <div class="meta">Role: {role_html} • Age: {age_html}</div>
-                        <div class="meta">Agency: {agency_html}</div>
-                        <div class="meta">Height: {height_html} • Waist: {waist_html} • Dress/Suit: {dress_html}</div>
-                        <div class="small">Availability: {avail_html}</div>
-                        <div class="small" style="margin-top:6px;"><strong>Sessions:</strong> {sess_names}</div>
-                    </div>
-                """
+                row_key = tuple(p.values())
+                card_html = prev_cards_html.get(row_key) or build_card_html(p)
+                # don't pin a card that is still showing the original while its thumbnail renders
+                if p["thumb_path"] or not p["photo_path"]:
+                    cards_html[row_key] = card_html
                 left.markdown(card_html, unsafe_allow_html=True)
 
                 # Edit/Delete controls on right column
                 if right.button("Edit", key=f"edit_{pid}"):
+                    st.session_state[f"_editing_{pid}"] = True
+                if st.session_state.get(f"_editing_{pid}"):
                     # open inline edit form
                     with st.form(f"edit_participant_{pid}"):
                         enumber = st.text_input("Number", value=p["number"] or "")
@@ -1286,31 +1891,22 @@ else:
                         eavail = st.text_input("Next Availability", value=p["availability"] or "")
                         ephoto = st.file_uploader("Upload Photo", type=["jpg","jpeg","png"])
                         # allow quick assignment to session(s)
-                        with db_connect() as conn:
-                            all_sessions = list_sessions_for_project(conn, project_id)
-                        session_ids_assigned = [s["id"] for s in sessions_for_participant(db_connect(), pid)]
+                        session_ids_assigned = {s["id"] for s in sessions_for_participant(get_read_conn(), pid)}
                         # show multi-select list of session names (pre-selected)
-                        sess_options = {f"{s['name']} — {s['date'] or 'no date'} (id:{s['id']})": s["id"] for s in all_sessions}
-                        sess_selected = []
-                        for k,v in sess_options.items():
-                            if v in session_ids_assigned:
-                                sess_selected.append(k)
+                        sess_selected = [k for k, v in sess_options.items() if v in session_ids_assigned]
                         sess_chosen = st.multiselect("Assign to sessions (participant will be added to selected sessions)", list(sess_options.keys()), default=sess_selected)
                         save_edit = st.form_submit_button("Save Changes")
                         cancel_edit = st.form_submit_button("Cancel")
                         if save_edit:
+                            new_photo_path = p["photo_path"]
+                            new_thumb_path = p["thumb_path"]
                             try:
+                                # copy the upload before taking the write lock
+                                if ephoto:
+                                    new_photo_path = save_photo_file(ephoto, current_username, current)
+                                    new_thumb_path = None
                                 with db_transaction() as conn:
-                                    new_photo_path = p["photo_path"]
-                                    if ephoto:
-                                        new_photo_path = save_photo_file(ephoto, current_username, current)
-                                        oldphoto = p["photo_path"]
-                                        if isinstance(oldphoto, str) and os.path.exists(oldphoto):
-                                            remove_media_file(oldphoto)
-                                    conn.execute("""
-                                        UPDATE participants SET number=?, name=?, role=?, age=?, agency=?, height=?, waist=?, dress_suit=?, availability=?, photo_path=?
-                                        WHERE id=?
-                                    """, (enumber, ename, erole, eage, eagency, eheight, ewaist, edress, eavail, new_photo_path, pid))
+                                    conn.execute(UPDATE_PARTICIPANT_SQL, (enumber, ename, erole, eage, eagency, eheight, ewaist, edress, eavail, new_photo_path, new_thumb_path, pid))
                                     # update session assignments: first remove existing associations for this project, then add selected
                                     # remove participant from all sessions of this project
                                     c = conn.cursor()
@@ -1320,133 +1916,118 @@ else:
                                         )
                                     """, (pid, project_id))
                                     # add back selected
-                                    for k in sess_chosen:
-                                        sid = sess_options.get(k)
-                                        if sid:
-                                            add_participant_to_session(conn, sid, pid)
+                                    now = datetime.now().isoformat()
+                                    c.executemany(
+                                        "INSERT INTO session_participants (session_id, participant_id, added_at) VALUES (?, ?, ?)",
+                                        [(sid, pid, now) for sid in dict.fromkeys(sess_options.get(k) for k in sess_chosen) if sid]
+                                    )
                                     log_action(current_username, "edit_participant", ename)
-                                st.success("Participant updated!")
-                                safe_rerun()
+                                    fresh = list_participants_with_sessions(conn, project_id, participant_id=pid)
+                                # the old photo goes only once the row no longer points at it
+                                if new_photo_path != p["photo_path"]:
+                                    remove_media_file(p["photo_path"])
+                                st.session_state.pop(f"_editing_{pid}", None)
+                                card_rows[pid] = fresh[0] if fresh else None
+                                st.toast("Participant updated!")
+                                rerun_fragment()
                             except Exception as e:
+                                if new_photo_path != p["photo_path"]:
+                                    remove_media_file(new_photo_path)
                                 st.error(f"Unable to save participant edits: {e}")
                         if cancel_edit:
-                            safe_rerun()
+                            st.session_state.pop(f"_editing_{pid}", None)
+                            rerun_fragment()
 
                 if right.button("Delete", key=f"del_{pid}"):
                     try:
                         with db_transaction() as conn:
-                            if isinstance(p["photo_path"], str) and os.path.exists(p["photo_path"]):
-                                remove_media_file(p["photo_path"])
-                            conn.execute("DELETE FROM participants WHERE id=?", (pid,))
-                            # also delete from session_participants
-                            conn.execute("DELETE FROM session_participants WHERE participant_id=?", (pid,))
+                            delete_participant(conn, pid)
                             log_action(current_username, "delete_participant", p["name"] or "")
-                        st.warning("Participant deleted")
-                        safe_rerun()
+                        remove_media_file(p["photo_path"])
+                        card_rows[pid] = None
+                        st.toast("Participant deleted")
+                        rerun_fragment()
                     except Exception as e:
                         st.error(f"Unable to delete participant: {e}")
 
+            for p in participants:
+                render_participant_card(p, project_id, current, current_username)
+            if thumb_backfill:
+                try:
+                    with db_transaction() as conn:
+                        conn.executemany("UPDATE participants SET thumb_path=? WHERE id=?", thumb_backfill)
+                except Exception:
+                    pass
+                thumb_backfill.clear()
+
         # ------------------------
         # Export to Word (session-aware)
         # ------------------------
         st.subheader("📄 Export Participants (Word)")
         if st.button("Download Word File of Current View"):
             try:
-                with db_connect() as conn:
-                    cur = conn.cursor()
-                    if st.session_state.get("viewing_session_id"):
-                        # export participants in the selected session
-                        sid = st.session_state["viewing_session_id"]
-                        cur.execute("""
-                            SELECT p.* FROM participants p
-                            JOIN session_participants sp ON sp.participant_id = p.id
-                            WHERE sp.session_id = ?
-                            ORDER BY p.id
-                        """, (sid,))
-                        parts = cur.fetchall()
-                        # get session name for filename
-                        srow = get_session_by_id(conn, sid)
-                        fname_base = f"{current}_session_{srow['name']}" if srow else f"{current}_session_{sid}"
-                    else:
-                        cur.execute("SELECT * FROM participants WHERE project_id=? ORDER BY id", (project_id,))
-                        parts = cur.fetchall()
-                        fname_base = f"{current}_participants"
-                    if not parts:
-                        st.info("No participants to export for this view.")
-                    else:
-                        doc = Document()
-                        heading = f"Participants - {current}"
-                        if st.session_state.get("viewing_session_id"):
-                            heading += f" - Session: {srow['name']}"
-                        doc.add_heading(heading, 0)
-                        for p in parts:
-                            table = doc.add_table(rows=1, cols=2)
-                            table.autofit = False
-                            table.columns[0].width = Inches(1.7)
-                            table.columns[1].width = Inches(4.5)
-                            row_cells = table.rows[0].cells
-
-                            # Prefer thumbnail if available
-                            display_path = thumb_path_for(safe_field(p, "photo_path", ""))
-                            bytes_data = None
-                            if display_path and os.path.exists(display_path):
-                                try:
-                                    with open(display_path, "rb") as f:
-                                        bytes_data = f.read()
-                                except Exception:
-                                    bytes_data = None
-                            if bytes_data is None:
-                                bytes_data = get_photo_bytes(safe_field(p, "photo_path", ""))
+                # the current view was already loaded above (participants + session_row)
+                parts = participants
+                srow = session_row
+                if viewing_session_id:
+                    fname_base = f"{current}_session_{srow['name']}" if srow else f"{current}_session_{viewing_session_id}"
+                else:
+                    fname_base = f"{current}_participants"
+                if not parts:
+                    st.info("No participants to export for this view.")
+                else:
+                    doc = Document()
+                    heading = f"Participants - {current}"
+                    if srow:
+                        heading += f" - Session: {srow['name']}"
+                    doc.add_heading(heading, 0)
+                    for p in parts:
+                        table = doc.add_table(rows=1, cols=2)
+                        table.autofit = False
+                        table.columns[0].width = Inches(1.7)
+                        table.columns[1].width = Inches(4.5)
+                        row_cells = table.rows[0].cells
+
+                        # the 400px JPEG thumbnail is already export-sized; 1.5" at ~270 dpi
+                        thumb = p["thumb_path"] or ensure_thumbnail(p["photo_path"])
+                        if thumb:
+                            try:
+                                row_cells[0].paragraphs[0].add_run().add_picture(thumb, width=Inches(1.5))
+                            except Exception:
+                                row_cells[0].text = "Photo Error"
+                        else:
+                            row_cells[0].text = "No Photo"
+
+                        info_text = (
+                            f"Number: {p['number'] or ''}\n"
+                            f"Name: {p['name'] or ''}\n"
+                            f"Role: {p['role'] or ''}\n"
+                            f"Age: {p['age'] or ''}\n"
+                            f"Agency: {p['agency'] or ''}\n"
+                            f"Height: {p['height'] or ''}\n"
+                            f"Waist: {p['waist'] or ''}\n"
+                            f"Dress/Suit: {p['dress_suit'] or ''}\n"
+                            f"Next Available: {p['availability'] or ''}"
+                        )
+                        row_cells[1].text = info_text
+                        doc.add_paragraph("\n")
 
-                            if bytes_data:
-                                try:
-                                    image_stream = io.BytesIO(bytes_data)
-                                    image_stream.seek(0)
-                                    paragraph = row_cells[0].paragraphs[0]
-                                    run = paragraph.add_run()
-                                    try:
-                                        run.add_picture(image_stream, width=Inches(1.5))
-                                    except Exception:
-                                        tf = tempfile.NamedTemporaryFile(delete=False, suffix=".jpg")
-                                        try:
-                                            tf.write(bytes_data)
-                                            tf.flush()
-                                            tf.close()
-                                            run.add_picture(tf.name, width=Inches(1.5))
-                                        finally:
-                                            try:
-                                                os.unlink(tf.name)
-                                            except Exception:
-                                                pass
-                                except Exception:
-                                    row_cells[0].text = "Photo Error"
-                            else:
-                                row_cells[0].text = "No Photo"
-
-                            info_text = (
-                                f"Number: {safe_field(p, 'number','')}\n"
-                                f"Name: {safe_field(p, 'name','')}\n"
-                                f"Role: {safe_field(p, 'role','')}\n"
-                                f"Age: {safe_field(p, 'age','')}\n"
-                                f"Agency: {safe_field(p, 'agency','')}\n"
-                                f"Height: {safe_field(p, 'height','')}\n"
-                                f"Waist: {safe_field(p, 'waist','')}\n"
-                                f"Dress/Suit: {safe_field(p, 'dress_suit','')}\n"
-                                f"Next Available: {safe_field(p, 'availability','')}"
+                    filename = f"{fname_base}.docx".replace(" ", "_")
+                    with tempfile.NamedTemporaryFile(delete=False, suffix=".docx") as tf:
+                        doc.save(tf)
+                    try:
+                        with open(tf.name, "rb") as word_file:
+                            st.download_button(
+                                label="Click to download Word file",
+                                data=word_file,
+                                file_name=filename,
+                                mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document"
                             )
-                            row_cells[1].text = info_text
-                            doc.add_paragraph("\n")
-
-                        word_stream = io.BytesIO()
-                        doc.save(word_stream)
-                        word_stream.seek(0)
-                        filename = f"{fname_base}.docx".replace(" ", "_")
-                        st.download_button(
-                            label="Click to download Word file",
-                            data=word_stream,
-                            file_name=filename,
-                            mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document"
-                        )
+                    finally:
+                        try:
+                            os.unlink(tf.name)
+                        except Exception:
+                            pass
             except Exception as e:
                 st.error(f"Unable to generate Word file: {e}")
 
@@ -1459,17 +2040,36 @@ else:
             if st.button("🔄 Refresh Users"):
                 safe_rerun()
 
-            with db_connect() as conn:
-                cur = conn.cursor()
-                cur.execute("SELECT * FROM users ORDER BY username COLLATE NOCASE")
-                users_rows = cur.fetchall()
-
             ucol1, ucol2 = st.columns([3,2])
             with ucol1:
                 uquery = st.text_input("Search accounts by username or role")
             with ucol2:
                 urole_filter = st.selectbox("Filter role", ["All", "Admin", "Casting Director", "Assistant"], index=0)
 
+            # filter in SQL so only the rows shown come back
+            like = None
+            if uquery:
+                like = "%" + uquery.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+            user_filter = """
+                (? IS NULL OR username LIKE ? ESCAPE '\\' OR role LIKE ? ESCAPE '\\')
+                AND (? IS NULL OR role = ?)
+            """
+            role_param = None if urole_filter == "All" else urole_filter
+            filter_params = (like, like, like, role_param, role_param)
+            conn = get_read_conn()
+            cur = conn.cursor()
+            cur.execute(f"SELECT * FROM users WHERE {user_filter} ORDER BY username COLLATE NOCASE", filter_params)
+            users_rows = cur.fetchall()
+            # every listed user's project names in one query instead of one per row
+            projects_by_uid = {}
+            cur.execute(f"""
+                SELECT user_id, name FROM projects
+                WHERE user_id IN (SELECT id FROM users WHERE {user_filter})
+                ORDER BY name COLLATE NOCASE
+            """, filter_params)
+            for r in cur.fetchall():
+                projects_by_uid.setdefault(r["user_id"], []).append(r["name"])
+
             uhdr = st.columns([3,2,3,3,4])
             uhdr[0].markdown("**Username**"); uhdr[1].markdown("**Role**"); uhdr[2].markdown("**Last Login**"); uhdr[3].markdown("**Projects**"); uhdr[4].markdown("**Actions**")
 
@@ -1477,16 +2077,7 @@ else:
                 uname = u["username"]
                 urole = u["role"]
                 last = u["last_login"]
-                with db_connect() as conn:
-                    cur = conn.cursor()
-                    cur.execute("SELECT name FROM projects WHERE user_id=? ORDER BY name COLLATE NOCASE", (u["id"],))
-                    pr = [r["name"] for r in cur.fetchall()]
-                projlist = ", ".join(pr)
-
-                if uquery and uquery.lower() not in uname.lower() and uquery.lower() not in (urole or "").lower():
-                    continue
-                if urole_filter != "All" and urole != urole_filter:
-                    continue
+                projlist = ", ".join(projects_by_uid.get(u["id"], []))
 
                 cols = st.columns([3,2,3,3,4])
                 cols[0].markdown(f"**{uname}**")
@@ -1500,6 +2091,7 @@ else:
                         with db_transaction() as conn:
                             conn.execute("UPDATE users SET role=? WHERE username=?", (role_sel, uname))
                             log_action(current_username, "change_role", f"{uname} -> {role_sel}")
+                        bump_user_version(uname)
                         st.success(f"Role updated for {uname}.")
                         safe_rerun()
                     except Exception as e:
@@ -1509,28 +2101,29 @@ else:
                     if uname == "admin":
                         st.error("Cannot delete the built-in admin.")
                     else:
-                        try:
-                            user_media = os.path.join(MEDIA_DIR, _sanitize_for_path(uname))
-                            if os.path.exists(user_media):
-                                shutil.rmtree(user_media)
-                        except Exception:
-                            pass
                         try:
                             with db_transaction() as conn:
                                 cur = conn.cursor()
-                                cur.execute("SELECT id FROM users WHERE username=?", (uname,))
-                                r = cur.fetchone()
-                                if r:
-                                    uid = r["id"]
-                                    cur.execute("SELECT photo_path FROM participants WHERE project_id IN (SELECT id FROM projects WHERE user_id=?)", (uid,))
-                                    for rr in cur.fetchall():
-                                        pf = rr["photo_path"]
-                                        if isinstance(pf, str) and os.path.exists(pf):
-                                            remove_media_file(pf)
-                                    cur.execute("DELETE FROM participants WHERE project_id IN (SELECT id FROM projects WHERE user_id=?)", (uid,))
-                                    cur.execute("DELETE FROM projects WHERE user_id=?", (uid,))
-                                    cur.execute("DELETE FROM users WHERE id=?", (uid,))
-                                    log_action(current_username, "delete_user", uname)
+                                # photo paths for file cleanup, then one DELETE cascades to
+                                # projects, participants, sessions and session links
+                                cur.execute("""
+                                    SELECT x.photo_path FROM participants x
+                                    JOIN projects p ON p.id = x.project_id
+                                    WHERE p.user_id=? AND x.photo_path IS NOT NULL
+                                """, (u["id"],))
+                                paths = [rr["photo_path"] for rr in cur.fetchall()]
+                                cur.execute("DELETE FROM users WHERE id=?", (u["id"],))
+                                log_action(current_username, "delete_user", uname)
+                            bump_user_version(uname)
+                            # unlink after the commit, in parallel; each file is a few syscalls
+                            with ThreadPoolExecutor(max_workers=8) as ex:
+                                list(ex.map(remove_media_file, paths))
+                            try:
+                                user_media = os.path.join(MEDIA_DIR, _sanitize_for_path(uname))
+                                if os.path.exists(user_media):
+                                    shutil.rmtree(user_media)
+                            except Exception:
+                                pass
                             st.warning(f"User {uname} deleted.")
                             safe_rerun()
                         except Exception as e:
@@ -1542,11 +2135,11 @@ else:
             st.subheader("🗄️ Database Manager")
             st.markdown("**Browse tables | Schema | Data (paginated)**")
             try:
-                with db_connect() as conn:
-                    c = conn.cursor()
-                    c.execute("SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%' ORDER BY name")
-                    table_rows = c.fetchall()
-                    tables = [r["name"] for r in table_rows]
+                conn = get_read_conn()
+                c = conn.cursor()
+                c.execute("SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%' ORDER BY name")
+                table_rows = c.fetchall()
+                tables = [r["name"] for r in table_rows]
             except Exception as e:
                 tables = []
                 st.error(f"Unable to list tables: {e}")
@@ -1557,30 +2150,30 @@ else:
                 chosen_table = st.selectbox("Select table to inspect", ["-- choose table --"] + tables)
                 if chosen_table and chosen_table != "-- choose table --":
                     try:
-                        with db_connect() as conn:
-                            cur = conn.cursor()
-                            cur.execute(f"PRAGMA table_info('{chosen_table}')")
-                            schema_rows = cur.fetchall()
-                            schema_display = []
-                            for col in schema_rows:
-                                schema_display.append({
-                                    "cid": col["cid"],
-                                    "name": col["name"],
-                                    "type": col["type"],
-                                    "notnull": bool(col["notnull"]),
-                                    "default": col["dflt_value"],
-                                    "pk": bool(col["pk"]) }
-                                )
-                            st.markdown("**Schema**")
-                            st.table(schema_display)
+                        conn = get_read_conn()
+                        cur = conn.cursor()
+                        cur.execute(f"PRAGMA table_info('{chosen_table}')")
+                        schema_rows = cur.fetchall()
+                        schema_display = []
+                        for col in schema_rows:
+                            schema_display.append({
+                                "cid": col["cid"],
+                                "name": col["name"],
+                                "type": col["type"],
+                                "notnull": bool(col["notnull"]),
+                                "default": col["dflt_value"],
+                                "pk": bool(col["pk"]) }
+                            )
+                        st.markdown("**Schema**")
+                        st.table(schema_display)
                     except Exception as e:
                         st.error(f"Unable to get schema: {e}")
 
                     try:
-                        with db_connect() as conn:
-                            cur = conn.cursor()
-                            count_row = cur.execute(f"SELECT COUNT(*) as c FROM '{chosen_table}'").fetchone()
-                            total_count = count_row["c"] if count_row else 0
+                        conn = get_read_conn()
+                        cur = conn.cursor()
+                        count_row = cur.execute(f"SELECT COUNT(*) as c FROM '{chosen_table}'").fetchone()
+                        total_count = count_row["c"] if count_row else 0
                     except Exception as e:
                         total_count = 0
                         st.error(f"Unable to count rows: {e}")
@@ -1591,13 +2184,13 @@ else:
                     offset = (page - 1) * per_page
 
                     try:
-                        with db_connect() as conn:
-                            cur = conn.cursor()
-                            cur.execute(f"SELECT * FROM '{chosen_table}' LIMIT ? OFFSET ?", (per_page, offset))
-                            rows = cur.fetchall()
-                            data = [dict(r) for r in rows]
-                            st.markdown(f"**Showing page {page} / {total_pages} — {total_count} rows total**")
-                            st.dataframe(data)
+                        conn = get_read_conn()
+                        cur = conn.cursor()
+                        cur.execute(f"SELECT * FROM '{chosen_table}' LIMIT ? OFFSET ?", (per_page, offset))
+                        rows = cur.fetchall()
+                        data = [dict(r) for r in rows]
+                        st.markdown(f"**Showing page {page} / {total_pages} — {total_count} rows total**")
+                        st.dataframe(data)
                     except Exception as e:
                         st.error(f"Unable to fetch table data: {e}")
 
@@ -1630,7 +2223,8 @@ else:
                 tmp_db_fd, tmp_db_path = tempfile.mkstemp(prefix="backup_copy_", suffix=".db", dir=db_dir)
                 os.close(tmp_db_fd)
                 try:
-                    src_conn = get_db_conn()
+                    flush_logs()  # buffered audit rows belong in the backup
+                    src_conn = get_read_conn()
                     dest_conn = sqlite3.connect(tmp_db_path)
                     try:
                         src_conn.backup(dest_conn, pages=0)
@@ -1757,13 +2351,17 @@ else:
                                 try:
                                     # close cached connections & clear
                                     try:
+                                        flush_logs()
+                                        stop_background_workers()
                                         conn_cached = get_db_conn()
                                         try: conn_cached.close()
                                         except Exception: pass
+                                        close_read_conns()
                                     except Exception:
                                         pass
                                     try:
                                         st.cache_resource.clear()
+                                        st.cache_data.clear()
                                     except Exception:
                                         pass
                                     time.sleep(0.2)
@@ -1828,7 +2426,9 @@ else:
                                     try: shutil.rmtree(extract_dir, ignore_errors=True)
                                     except Exception: pass
                                     try:
+                                        stop_background_workers()
                                         st.cache_resource.clear()
+                                        st.cache_data.clear()
                                     except Exception: pass
                                     time.sleep(0.2)
                                     # verification